@@ -1,34 +1,25 @@
-from flask import Flask, redirect, request, render_template, session, jsonify
+from flask import Blueprint, Flask, Response, current_app, redirect, request, render_template, session, jsonify, stream_with_context
+import click
+import hmac
 import os
 import base64
 import requests
 from datetime import datetime
 from dotenv import load_dotenv
+from sqlalchemy import text
+from sqlalchemy.orm import joinedload
 
 # Import our database models
 from models import (
     db, init_db, User, AnalysisSession, Artist, Track, TrackAnalysis,
     get_or_create_user, get_or_create_artist, get_or_create_track
 )
+from export import EXPORT_ENTITIES, EXPORT_FORMATS, parse_timestamp, parse_user_id, stream_export
+from records import AnalysisRecord, ArtistRecord, TrackRecord
 
-# Load environment variables
-load_dotenv()
-
-# Flask app setup
-app = Flask(__name__)
-
-# Configuration from environment variables
-app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('DATABASE_URL')
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', os.urandom(24))
-
-# Spotify API credentials from environment
-CLIENT_ID = os.getenv('SPOTIFY_CLIENT_ID')
-CLIENT_SECRET = os.getenv('SPOTIFY_CLIENT_SECRET')
-REDIRECT_URI = os.getenv('SPOTIFY_REDIRECT_URI')
-
-# Initialize database
-init_db(app)
+# Routes and CLI commands live on a blueprint so importing this module has no side effects;
+# the app itself is built by create_app()
+bp = Blueprint('main', __name__, cli_group=None)
 
 # Define "cool" genres for scoring algorithm
 COOL_GENRES = [
@@ -51,15 +42,14 @@ COOL_GENRES = [
 ]
 
 
-def calculate_cool_score(track_item, artist_metadata):
+def calculate_cool_score(track, artist_metadata):
     """
     Calculate the 'cool score' for a track based on multiple factors
     """
-    artist_id = track_item["artists"][0]["id"]
-    artist_data = artist_metadata.get(artist_id, {})
-    genres = artist_data.get("genres", [])
-    popularity = artist_data.get("popularity", None)
-    followers = artist_data.get("followers", None)
+    artist = artist_metadata.get(track.artist_id)
+    genres = artist.genres if artist else ()
+    popularity = artist.popularity if artist else None
+    followers = artist.followers if artist else None
     
     score = 0
     
@@ -68,7 +58,7 @@ def calculate_cool_score(track_item, artist_metadata):
         score += 50
     
     # Explicit content bonus
-    if track_item["explicit"]:
+    if track.explicit:
         score += 5
     
     # Artist popularity scaling - less popular = more points
@@ -110,17 +100,17 @@ def calculate_cool_score(track_item, artist_metadata):
             score += 6
     
     # Track popularity scaling - underground tracks score higher
-    if track_item["popularity"] < 50:
+    if track.popularity < 50:
         score += 11
-    elif track_item["popularity"] < 60:
+    elif track.popularity < 60:
         score += 9
-    elif track_item["popularity"] < 70:
+    elif track.popularity < 70:
         score += 7
-    elif track_item["popularity"] < 80:
+    elif track.popularity < 80:
         score += 5
-    elif track_item["popularity"] < 90:
+    elif track.popularity < 90:
         score += 3
-    elif track_item["popularity"] < 100:
+    elif track.popularity < 100:
         score += 1
     
     # Cap score at 100 and round to 2 decimal places
@@ -141,21 +131,17 @@ def get_spotify_data(access_token):
     
     # Get user's top 20 tracks
     tracks_response = requests.get("https://api.spotify.com/v1/me/top/tracks?limit=20", headers=api_headers)
-    tracks_data = tracks_response.json()
-    
-    # Get user's top 20 artists for additional context
-    artists_response = requests.get("https://api.spotify.com/v1/me/top/artists?limit=20", headers=api_headers)
-    top_artists_data = artists_response.json()
+    tracks = [TrackRecord.from_spotify(item) for item in tracks_response.json()["items"]]
     
-    return user_data, tracks_data, top_artists_data
+    return user_data, tracks
 
 
-def collect_artist_metadata(tracks_data, api_headers):
+def collect_artist_metadata(tracks, api_headers):
     """
     Collect detailed metadata for all artists in the tracks
     """
     # Get unique artist IDs
-    artist_ids = list(set([item["artists"][0]["id"] for item in tracks_data["items"]]))
+    artist_ids = list(set([track.artist_id for track in tracks]))
     artist_metadata = {}
     
     for artist_id in artist_ids:
@@ -163,13 +149,7 @@ def collect_artist_metadata(tracks_data, api_headers):
         artist_response = requests.get(artist_url, headers=api_headers)
         
         if artist_response.status_code == 200:
-            artist_data = artist_response.json()
-            artist_metadata[artist_id] = {
-                "name": artist_data["name"],
-                "genres": artist_data["genres"],
-                "popularity": artist_data["popularity"],
-                "followers": artist_data["followers"]["total"]
-            }
+            artist_metadata[artist_id] = ArtistRecord.from_spotify(artist_response.json())
         else:
             print(f"Failed to get data for artist {artist_id}")
     
@@ -177,13 +157,24 @@ def collect_artist_metadata(tracks_data, api_headers):
 
 
 # Route: Landing page
-@app.route("/")
+@bp.route("/")
 def landing():
     return render_template('landing.html')
 
 
+# Route: Readiness probe - checks the database so load balancers only route to ready workers
+@bp.route("/ready")
+def ready():
+    try:
+        db.session.execute(text("SELECT 1"))
+    except Exception as e:
+        print(f"Readiness check failed: {e}")
+        return jsonify({"status": "unavailable"}), 503
+    return jsonify({"status": "ready"})
+
+
 # Route: Review page - displays track analysis interface
-@app.route("/review", methods=["GET", "POST"])
+@bp.route("/review", methods=["GET", "POST"])
 def review():
     # Check if we have a current session
     if "session_id" not in session:
@@ -195,7 +186,13 @@ def review():
         return redirect("/login")
     
     # Get all track analyses for this session, ordered by position
-    track_analyses = TrackAnalysis.query.filter_by(session_id=analysis_session.id).order_by(TrackAnalysis.track_position).all()
+    track_analyses = (
+        TrackAnalysis.query
+        .options(joinedload(TrackAnalysis.track).joinedload(Track.artist))
+        .filter_by(session_id=analysis_session.id)
+        .order_by(TrackAnalysis.track_position)
+        .all()
+    )
     
     if not track_analyses:
         return redirect("/login")
@@ -214,26 +211,16 @@ def review():
     # Get current track analysis
     current_analysis = track_analyses[session["track_index"]]
     
-    # Format the track data for the template (same structure as before)
-    current_track = {
-        "track_name": current_analysis.track.name,
-        "artist_name": current_analysis.track.artist.name,
-        "track_popularity": current_analysis.track.popularity,
-        "cool_score": float(current_analysis.cool_score) if current_analysis.cool_score else None,
-        "genres": current_analysis.track.artist.genres or [],
-        "is_scored": current_analysis.is_scored
-    }
-    
     return render_template(
         'index.html', 
-        track=current_track, 
+        track=AnalysisRecord.from_model(current_analysis), 
         username=analysis_session.user.display_name or "there",
-        tracks=[{"track_name": ta.track.name} for ta in track_analyses]  # Just for count
+        tracks=track_analyses  # Just for count
     )
 
 
 # Route: Results page - displays final score and track breakdown
-@app.route("/results")
+@bp.route("/results")
 def results():
     # Check if we have a current session
     if "session_id" not in session:
@@ -244,8 +231,13 @@ def results():
     if not analysis_session:
         return redirect("/login")
     
-    # Get all track analyses for this session
-    track_analyses = TrackAnalysis.query.filter_by(session_id=analysis_session.id).all()
+    # Get all track analyses for this session, with tracks and artists in the same query
+    track_analyses = (
+        TrackAnalysis.query
+        .options(joinedload(TrackAnalysis.track).joinedload(Track.artist))
+        .filter_by(session_id=analysis_session.id)
+        .all()
+    )
     
     # Calculate statistics
     scored_analyses = [ta for ta in track_analyses if ta.is_scored and ta.cool_score is not None]
@@ -285,16 +277,7 @@ def results():
     all_analyses_sorted = scored_sorted + unscored_analyses
     
     # Format tracks for template
-    tracks = []
-    for ta in all_analyses_sorted:
-        tracks.append({
-            "track_name": ta.track.name,
-            "artist_name": ta.track.artist.name,
-            "track_popularity": ta.track.popularity,
-            "cool_score": float(ta.cool_score) if ta.cool_score else None,
-            "genres": ta.track.artist.genres or [],
-            "is_scored": ta.is_scored
-        })
+    tracks = [AnalysisRecord.from_model(ta) for ta in all_analyses_sorted]
     
     return render_template(
         'results.html',
@@ -309,21 +292,21 @@ def results():
 
 
 # Route: Spotify login redirect
-@app.route("/login")
+@bp.route("/login")
 def login():
     scopes = "user-top-read user-read-private"
     auth_url = (
         "https://accounts.spotify.com/authorize"
-        f"?client_id={CLIENT_ID}"
+        f"?client_id={current_app.config['SPOTIFY_CLIENT_ID']}"
         f"&response_type=code"
-        f"&redirect_uri={REDIRECT_URI}"
+        f"&redirect_uri={current_app.config['SPOTIFY_REDIRECT_URI']}"
         f"&scope={scopes}"
     )
     return redirect(auth_url)
 
 
 # Route: OAuth callback handler
-@app.route("/callback")
+@bp.route("/callback")
 def callback():
     # Get authorization code from callback
     code = request.args.get("code")
@@ -332,7 +315,9 @@ def callback():
     
     # Exchange authorization code for access token
     token_url = "https://accounts.spotify.com/api/token"
-    auth_header = base64.b64encode(f"{CLIENT_ID}:{CLIENT_SECRET}".encode()).decode()
+    client_id = current_app.config['SPOTIFY_CLIENT_ID']
+    client_secret = current_app.config['SPOTIFY_CLIENT_SECRET']
+    auth_header = base64.b64encode(f"{client_id}:{client_secret}".encode()).decode()
     
     token_headers = {
         "Authorization": f"Basic {auth_header}",
@@ -342,7 +327,7 @@ def callback():
     token_data = {
         "grant_type": "authorization_code",
         "code": code,
-        "redirect_uri": REDIRECT_URI
+        "redirect_uri": current_app.config['SPOTIFY_REDIRECT_URI']
     }
     
     # Request access token
@@ -356,7 +341,7 @@ def callback():
     api_headers = {"Authorization": f"Bearer {access_token}"}
     
     # Fetch user data from Spotify
-    user_data, tracks_data, top_artists_data = get_spotify_data(access_token)
+    user_data, tracks = get_spotify_data(access_token)
     
     # Create or get user
     user = get_or_create_user(
@@ -367,7 +352,7 @@ def callback():
     # Create new analysis session
     analysis_session = AnalysisSession(
         user_id=user.id,
-        total_tracks=len(tracks_data["items"]),
+        total_tracks=len(tracks),
         scored_tracks=0,  # Will be updated as we process
         unscored_tracks=0  # Will be updated as we process
     )
@@ -375,46 +360,49 @@ def callback():
     db.session.flush()  # Get the ID without committing
     
     # Collect detailed artist metadata
-    artist_metadata = collect_artist_metadata(tracks_data, api_headers)
+    artist_metadata = collect_artist_metadata(tracks, api_headers)
     
     # Process tracks and calculate scores
     scored_count = 0
     unscored_count = 0
     
-    for position, track_item in enumerate(tracks_data["items"], 1):
-        artist_id = track_item["artists"][0]["id"]
-        artist_data = artist_metadata.get(artist_id, {})
+    for position, track_record in enumerate(tracks, 1):
+        # Fall back to the track's simplified artist if the full lookup failed
+        artist_record = artist_metadata.get(track_record.artist_id) or ArtistRecord(
+            spotify_id=track_record.artist_id,
+            name=track_record.artist_name
+        )
         
         # Create or get artist
         artist = get_or_create_artist(
-            spotify_id=artist_id,
-            name=artist_data.get("name", track_item["artists"][0]["name"]),
-            genres=artist_data.get("genres", []),
-            popularity=artist_data.get("popularity"),
-            followers=artist_data.get("followers")
+            spotify_id=artist_record.spotify_id,
+            name=artist_record.name,
+            genres=list(artist_record.genres),
+            popularity=artist_record.popularity,
+            followers=artist_record.followers
         )
         
         # Create or get track
         track = get_or_create_track(
-            spotify_id=track_item["id"],
-            name=track_item["name"],
+            spotify_id=track_record.spotify_id,
+            name=track_record.name,
             artist=artist,
-            popularity=track_item["popularity"],
-            explicit=track_item["explicit"]
+            popularity=track_record.popularity,
+            explicit=track_record.explicit
         )
         
         # Check if track has genres for scoring
-        has_genres = artist_data.get("genres") and len(artist_data.get("genres", [])) > 0
+        has_genres = len(artist_record.genres) > 0
         
         if has_genres:
-            cool_score = calculate_cool_score(track_item, artist_metadata)
+            cool_score = calculate_cool_score(track_record, artist_metadata)
             is_scored = True
             scored_count += 1
         else:
             cool_score = None
             is_scored = False
             unscored_count += 1
-            print(f"Track with no genres (unscored): {track_item['name']} by {track_item['artists'][0]['name']}")
+            print(f"Track with no genres (unscored): {track_record.name} by {track_record.artist_name}")
         
         # Create track analysis
         track_analysis = TrackAnalysis(
@@ -441,14 +429,14 @@ def callback():
 
 
 # API Routes (bonus endpoints for portfolio)
-@app.route("/api/sessions/<int:session_id>")
+@bp.route("/api/sessions/<int:session_id>")
 def api_get_session(session_id):
     """API endpoint to get session data as JSON"""
     analysis_session = AnalysisSession.query.get_or_404(session_id)
     return jsonify(analysis_session.to_dict())
 
 
-@app.route("/api/users/<int:user_id>/sessions")
+@bp.route("/api/users/<int:user_id>/sessions")
 def api_get_user_sessions(user_id):
     """API endpoint to get all sessions for a user"""
     user = User.query.get_or_404(user_id)
@@ -456,6 +444,95 @@ def api_get_user_sessions(user_id):
     return jsonify([session.to_dict() for session in sessions])
 
 
+@bp.route("/api/export/<entity>")
+def api_export(entity):
+    """
+    API endpoint to stream a bulk export of sessions, analyses, tracks or artists.
+    Requires "Authorization: Bearer <EXPORT_API_TOKEN>"; disabled when no token is configured.
+    """
+    export_token = current_app.config.get('EXPORT_API_TOKEN')
+    if not export_token:
+        return jsonify({"error": "Export API is disabled"}), 403
+
+    auth_header = request.headers.get("Authorization", "")
+    # Compare bytes: compare_digest rejects non-ASCII str, and headers arrive latin-1 decoded
+    provided_token = auth_header[len("Bearer "):].encode()
+    if not auth_header.startswith("Bearer ") or not hmac.compare_digest(provided_token, export_token.encode()):
+        return jsonify({"error": "Missing or invalid export token"}), 401
+
+    fmt = request.args.get("format", "ndjson")
+    try:
+        chunks = stream_export(
+            entity,
+            fmt=fmt,
+            user_id=parse_user_id(request.args.get("user_id")),
+            since=parse_timestamp(request.args.get("since")),
+            until=parse_timestamp(request.args.get("until"))
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    return Response(
+        stream_with_context(chunks),
+        mimetype=EXPORT_FORMATS[fmt],
+        headers={"Content-Disposition": f"attachment; filename=spotijudge_{entity}.{fmt}"}
+    )
+
+
+# CLI: flask export <entity> for nightly dumps
+@bp.cli.command("export")
+@click.argument("entity", type=click.Choice(list(EXPORT_ENTITIES)))
+@click.option("--format", "fmt", type=click.Choice(list(EXPORT_FORMATS)), default="ndjson")
+@click.option("--user-id", type=int, default=None, help="Only export data for this user")
+@click.option("--since", type=click.DateTime(), default=None, help="Only export rows from this time on")
+@click.option("--until", type=click.DateTime(), default=None, help="Only export rows before this time")
+@click.option("--output", type=click.File("w"), default="-", help="Output file (defaults to stdout)")
+def export_command(entity, fmt, user_id, since, until, output):
+    """Stream a bulk export of ENTITY as NDJSON or CSV"""
+    for chunk in stream_export(entity, fmt=fmt, user_id=user_id, since=since, until=until):
+        output.write(chunk)
+
+
+# CLI: flask init-db creates the schema once per deploy instead of on every boot
+@bp.cli.command("init-db")
+def init_db_command():
+    """Create all database tables"""
+    db.create_all()
+    click.echo("Database initialized successfully!")
+
+
+def create_app():
+    """
+    Application factory. Connects to nothing at startup: the database engine
+    opens its first connection on the first query, and no schema DDL is run.
+    """
+    # Load environment variables
+    load_dotenv()
+
+    # Flask app setup
+    app = Flask(__name__)
+
+    # Configuration from environment variables
+    app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('DATABASE_URL')
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {'pool_pre_ping': True}
+    app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', os.urandom(24))
+
+    # Spotify API credentials from environment
+    app.config['SPOTIFY_CLIENT_ID'] = os.getenv('SPOTIFY_CLIENT_ID')
+    app.config['SPOTIFY_CLIENT_SECRET'] = os.getenv('SPOTIFY_CLIENT_SECRET')
+    app.config['SPOTIFY_REDIRECT_URI'] = os.getenv('SPOTIFY_REDIRECT_URI')
+
+    # Bearer token for the bulk export API (the endpoint is disabled when unset)
+    app.config['EXPORT_API_TOKEN'] = os.getenv('EXPORT_API_TOKEN')
+
+    # Initialize database
+    init_db(app)
+
+    app.register_blueprint(bp)
+    return app
+
+
 if __name__ == "__main__":
     # Bind to 0.0.0.0 so Docker can access it
-    app.run(host="0.0.0.0", port=5000, debug=True)
\ No newline at end of file
+    create_app().run(host="0.0.0.0", port=5000, debug=True)
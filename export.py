@@ -0,0 +1,195 @@
+"""
+Bulk export helpers for streaming Spotijudge data as NDJSON or CSV
+"""
+import csv
+import io
+import json
+from datetime import datetime, timezone
+from decimal import Decimal
+from uuid import UUID
+
+from sqlalchemy import select
+
+from models import db, AnalysisSession, Artist, Track, TrackAnalysis
+
+# Supported output formats and their response content types
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+# Rows fetched per round trip from the server-side cursor
+BATCH_SIZE = 1000
+
+# Approximate size of each chunk written to the response
+CHUNK_SIZE = 64 * 1024
+
+# Exportable entities: model, exported columns and the timestamp used for time-range filters.
+# Tracks and artists are filtered on updated_at so nightly dumps pick up refreshed metadata.
+EXPORT_ENTITIES = {
+    "sessions": (
+        AnalysisSession,
+        [
+            AnalysisSession.id, AnalysisSession.user_id, AnalysisSession.session_uuid,
+            AnalysisSession.final_score, AnalysisSession.total_tracks, AnalysisSession.scored_tracks,
+            AnalysisSession.unscored_tracks, AnalysisSession.created_at, AnalysisSession.completed_at
+        ],
+        AnalysisSession.created_at
+    ),
+    "analyses": (
+        TrackAnalysis,
+        [
+            TrackAnalysis.id, TrackAnalysis.session_id, TrackAnalysis.track_id,
+            TrackAnalysis.cool_score, TrackAnalysis.is_scored, TrackAnalysis.track_position,
+            TrackAnalysis.created_at
+        ],
+        TrackAnalysis.created_at
+    ),
+    "tracks": (
+        Track,
+        [
+            Track.id, Track.spotify_id, Track.name, Track.artist_id, Track.popularity,
+            Track.explicit, Track.created_at, Track.updated_at
+        ],
+        Track.updated_at
+    ),
+    "artists": (
+        Artist,
+        [
+            Artist.id, Artist.spotify_id, Artist.name, Artist.genres, Artist.popularity,
+            Artist.followers, Artist.created_at, Artist.updated_at
+        ],
+        Artist.updated_at
+    ),
+}
+
+
+def parse_timestamp(value):
+    """
+    Parse an optional ISO 8601 timestamp from a query parameter.
+    Returns naive UTC to match the utcnow-based timestamp columns.
+    """
+    if not value:
+        return None
+    # datetime.fromisoformat only accepts a trailing "Z" from Python 3.11
+    normalized = value[:-1] + "+00:00" if value.endswith(("Z", "z")) else value
+    try:
+        timestamp = datetime.fromisoformat(normalized)
+    except ValueError:
+        raise ValueError(f"Invalid timestamp: {value}")
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+    return timestamp
+
+
+def parse_user_id(value):
+    """Parse an optional user id from a query parameter"""
+    if not value:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError(f"Invalid user_id: {value}")
+
+
+def build_export_query(entity, user_id=None, since=None, until=None):
+    """Build the select statement for an entity with optional user and time-range filters"""
+    if entity not in EXPORT_ENTITIES:
+        raise ValueError(f"Unknown export entity: {entity}")
+
+    model, columns, timestamp = EXPORT_ENTITIES[entity]
+    stmt = select(*columns).order_by(model.id)
+
+    if since is not None:
+        stmt = stmt.where(timestamp >= since)
+    if until is not None:
+        stmt = stmt.where(timestamp < until)
+
+    if user_id is not None:
+        user_sessions = select(AnalysisSession.id).where(AnalysisSession.user_id == user_id)
+        user_tracks = select(TrackAnalysis.track_id).where(TrackAnalysis.session_id.in_(user_sessions))
+
+        if entity == "sessions":
+            stmt = stmt.where(AnalysisSession.user_id == user_id)
+        elif entity == "analyses":
+            stmt = stmt.where(TrackAnalysis.session_id.in_(user_sessions))
+        elif entity == "tracks":
+            stmt = stmt.where(Track.id.in_(user_tracks))
+        elif entity == "artists":
+            stmt = stmt.where(Artist.id.in_(select(Track.artist_id).where(Track.id.in_(user_tracks))))
+
+    return stmt
+
+
+def iter_rows(stmt):
+    """Yield result rows as mappings, streamed from a server-side cursor in batches"""
+    result = db.session.execute(stmt.execution_options(yield_per=BATCH_SIZE))
+    try:
+        for row in result.mappings():
+            yield row
+    finally:
+        result.close()
+
+
+def _json_value(value):
+    """Convert database values into JSON-serializable values"""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, UUID):
+        return str(value)
+    return value
+
+
+def _csv_value(value):
+    """Convert database values into flat CSV cells"""
+    if isinstance(value, list):
+        return "|".join(value)
+    if value is None:
+        return ""
+    return _json_value(value)
+
+
+def _iter_ndjson(rows):
+    buffer = io.StringIO()
+    for row in rows:
+        buffer.write(json.dumps({key: _json_value(value) for key, value in row.items()}))
+        buffer.write("\n")
+        if buffer.tell() >= CHUNK_SIZE:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def _iter_csv(rows, fieldnames):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(fieldnames)
+    for row in rows:
+        writer.writerow([_csv_value(row[name]) for name in fieldnames])
+        if buffer.tell() >= CHUNK_SIZE:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def stream_export(entity, fmt="ndjson", user_id=None, since=None, until=None):
+    """
+    Validate export options and return a generator of text chunks.
+    Validation happens eagerly so callers can report bad input before streaming starts.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format: {fmt}")
+
+    stmt = build_export_query(entity, user_id=user_id, since=since, until=until)
+    rows = iter_rows(stmt)
+
+    if fmt == "csv":
+        fieldnames = [column.key for column in EXPORT_ENTITIES[entity][1]]
+        return _iter_csv(rows, fieldnames)
+    return _iter_ndjson(rows)
@@ -0,0 +1,35 @@
+"""
+Gunicorn configuration for running Spotijudge in production.
+Every setting can be tuned from environment variables.
+"""
+import os
+
+# Bind to the port provided by the platform (Render sets PORT)
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+
+# Load the app once in the master so workers fork with it already imported.
+# This is safe with Postgres because create_app() opens no connections.
+preload_app = True
+
+# Worker model: gthread keeps long streaming exports from blocking a whole worker.
+# The worker count is a small fixed default rather than derived from cpu_count(),
+# which reports the host's cores inside containers. Each worker has its own
+# SQLAlchemy pool (pool_size 5 + max_overflow 10), so one instance can hold up to
+# workers * 15 Postgres connections; keep instances * that below max_connections.
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'gthread')
+workers = int(os.getenv('WEB_CONCURRENCY', '2'))
+threads = int(os.getenv('GUNICORN_THREADS', '4'))
+
+# Timeouts: let in-flight requests finish on deploys and scale-downs
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '60'))
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', '30'))
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', '5'))
+
+# Recycle workers periodically to cap memory growth
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', '1000'))
+max_requests_jitter = int(os.getenv('GUNICORN_MAX_REQUESTS_JITTER', '100'))
+
+# Log to stdout/stderr for the container runtime
+accesslog = '-'
+errorlog = '-'
+loglevel = os.getenv('GUNICORN_LOG_LEVEL', 'info')
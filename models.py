@@ -161,14 +161,11 @@ class TrackAnalysis(db.Model):
 
 
 def init_db(app):
-    """Initialize database with Flask app"""
+    """
+    Initialize database with Flask app. This only registers the extension;
+    tables are created with `flask init-db` rather than on every startup.
+    """
     db.init_app(app)
-    
-    with app.app_context():
-        # Create all tables
-        db.create_all()
-        
-        print("Database initialized successfully!")
 
 
 def get_or_create_user(spotify_id, display_name):
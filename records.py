@@ -0,0 +1,94 @@
+"""
+Compact in-memory records for Spotify payloads and scored analyses.
+
+Raw Spotify JSON is parsed straight into these records and then dropped, so
+unused fields (album, images, available_markets, ...) never outlive the request
+that fetched them. The same records are used for scoring, persistence and rendering.
+"""
+import sys
+
+
+class ArtistRecord:
+    """Artist fields used for scoring and caching"""
+    __slots__ = ('spotify_id', 'name', 'genres', 'popularity', 'followers')
+
+    def __init__(self, spotify_id, name, genres=(), popularity=None, followers=None):
+        self.spotify_id = spotify_id
+        self.name = name
+        self.genres = genres
+        self.popularity = popularity
+        self.followers = followers
+
+    @classmethod
+    def from_spotify(cls, data):
+        """Parse a full Spotify artist object"""
+        followers = data.get("followers") or {}
+        return cls(
+            spotify_id=data["id"],
+            name=data["name"],
+            # Genre strings repeat across many artists, so share one copy of each
+            genres=tuple(sys.intern(genre) for genre in data.get("genres") or ()),
+            popularity=data.get("popularity"),
+            followers=followers.get("total")
+        )
+
+    def __repr__(self):
+        return f'<ArtistRecord {self.name}>'
+
+
+class TrackRecord:
+    """Track fields used for scoring and persistence"""
+    __slots__ = ('spotify_id', 'name', 'artist_id', 'artist_name', 'popularity', 'explicit')
+
+    def __init__(self, spotify_id, name, artist_id, artist_name, popularity=0, explicit=False):
+        self.spotify_id = spotify_id
+        self.name = name
+        self.artist_id = artist_id
+        self.artist_name = artist_name
+        self.popularity = popularity
+        self.explicit = explicit
+
+    @classmethod
+    def from_spotify(cls, data):
+        """Parse a Spotify track object, keeping only its primary artist"""
+        primary_artist = data["artists"][0]
+        return cls(
+            spotify_id=data["id"],
+            name=data["name"],
+            artist_id=primary_artist["id"],
+            artist_name=primary_artist["name"],
+            popularity=data["popularity"],
+            explicit=data["explicit"]
+        )
+
+    def __repr__(self):
+        return f'<TrackRecord {self.name}>'
+
+
+class AnalysisRecord:
+    """Scored track analysis as shown on the review and results pages"""
+    __slots__ = ('track_name', 'artist_name', 'track_popularity', 'cool_score', 'genres', 'is_scored')
+
+    def __init__(self, track_name, artist_name, track_popularity, cool_score, genres, is_scored):
+        self.track_name = track_name
+        self.artist_name = artist_name
+        self.track_popularity = track_popularity
+        self.cool_score = cool_score
+        self.genres = genres
+        self.is_scored = is_scored
+
+    @classmethod
+    def from_model(cls, track_analysis):
+        """Build from a TrackAnalysis row; load its track and artist eagerly to avoid per-row queries"""
+        track = track_analysis.track
+        return cls(
+            track_name=track.name,
+            artist_name=track.artist.name,
+            track_popularity=track.popularity,
+            cool_score=float(track_analysis.cool_score) if track_analysis.cool_score else None,
+            genres=tuple(track.artist.genres or ()),
+            is_scored=track_analysis.is_scored
+        )
+
+    def __repr__(self):
+        return f'<AnalysisRecord {self.track_name}: {self.cool_score}>'